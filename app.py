@@ -1,5 +1,6 @@
 import streamlit as st
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from audio_recorder_streamlit import audio_recorder
 
@@ -12,6 +13,73 @@ import tts
 # Load environment variables
 load_dotenv()
 
+# Background workers for TTS synthesis; module state survives Streamlit
+# reruns, so the pool is created once per server process
+_TTS_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+
+@st.cache_resource(show_spinner=False)
+def _local_whisper_model():
+    """
+    Keep the local Whisper model alive across Streamlit reruns and
+    script edits. Skips the load entirely when hosted Groq transcription
+    is configured, since the local model would only be a cold fallback.
+    """
+    if os.getenv("GROQ_API_KEY"):
+        return None
+
+    try:
+        return asr.get_whisper_model()
+    except Exception as e:
+        print(f"Local Whisper model unavailable: {e}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def _piper_voice():
+    """
+    Keep the Piper TTS voice alive across Streamlit reruns. Returns
+    None when piper-tts or the voice model isn't available.
+    """
+    return tts.get_piper_voice()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_user_history(user_id, limit):
+    """
+    Memoized history lookup so reruns on unchanged state skip the SQLite
+    round-trip. Cleared after a new conversation is saved.
+    """
+    return db.get_user_history(user_id, limit=limit)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_tts_cache_stats():
+    """
+    Memoized TTS cache stats so every sidebar rerun doesn't rescan the
+    cache directory. Cleared explicitly when the cache is cleared.
+    """
+    return tts.get_cache_stats()
+
+
+def _stream_response_with_tts(deltas, tts_futures):
+    """
+    Re-yield the LLM response sentence by sentence while dispatching each
+    completed sentence to the TTS worker pool, so audio synthesis
+    overlaps generation instead of waiting for the full response.
+
+    Args:
+        deltas: Iterator of text chunks from the LLM
+        tts_futures: List to append TTS futures to as sentences complete
+    """
+    for segment in groq_client.iter_sentences(deltas):
+        # Strip only the TTS copy; the displayed/saved text keeps the
+        # response's original whitespace and newlines
+        sentence = segment.strip()
+        if sentence:
+            tts_futures.append(_TTS_EXECUTOR.submit(tts.text_to_speech, sentence))
+        yield segment
+
 
 def init_session_state():
     """
@@ -42,7 +110,7 @@ def _load_user_last_conversation_into_session(user_id):
         if not user_id:
             return
         # Try to get the most recent entry for this specific user
-        history = db.get_user_history(user_id, limit=1)  # should return list of dicts
+        history = _cached_user_history(user_id, limit=1)  # should return list of dicts
         if history and len(history) > 0:
             item = history[0]
             st.session_state.last_transcript = item.get('query')
@@ -132,11 +200,12 @@ def main_app():
         st.divider()
 
         # Cache stats
-        cache_stats = tts.get_cache_stats()
+        cache_stats = _cached_tts_cache_stats()
         st.caption(f"TTS Cache: {cache_stats['file_count']} files ({cache_stats['total_size_mb']} MB)")
 
         if st.button("Clear Cache"):
             tts.clear_cache()
+            _cached_tts_cache_stats.clear()
             st.success("Cache cleared!")
             st.rerun()
 
@@ -149,6 +218,9 @@ def main_app():
         st.error("⚠️ GROQ_API_KEY not found in environment variables. Please set it in your .env file.")
         st.stop()
 
+    # Warm the TTS voice once so the first response doesn't pay the load
+    _piper_voice()
+
     # If we have an authenticated user but no last_transcript in session,
     # attempt to load their most recent conversation.
     if st.session_state.authenticated and not st.session_state.last_transcript:
@@ -169,14 +241,22 @@ def main_app():
         st.audio(audio_bytes, format="audio/wav")
 
         with st.spinner("Transcribing your question..."):
-            transcript = asr.transcribe_audio(audio_bytes)
+            transcript = asr.transcribe_audio(audio_bytes, model=_local_whisper_model())
 
         if transcript:
             st.session_state.last_transcript = transcript
             st.success(f"**You said:** {transcript}")
 
-            with st.spinner("Thinking..."):
-                response = groq_client.get_learning_assistant_response(transcript)
+            # Stream the response so TTS synthesis of completed sentences
+            # overlaps with generation of the remaining tokens
+            deltas = groq_client.get_learning_assistant_response_stream(transcript)
+
+            response = None
+            tts_futures = []
+
+            if deltas:
+                st.markdown("### 🤖 Assistant's Response")
+                response = st.write_stream(_stream_response_with_tts(deltas, tts_futures))
 
             if response:
                 st.session_state.last_response = response
@@ -189,32 +269,38 @@ def main_app():
                         response,
                         # optionally include audio_path if your DB schema supports it
                     )
+                    # History changed; drop the memoized lookups
+                    _cached_user_history.clear()
                 except Exception:
                     # avoid crashing; warn the user
                     st.warning("Could not save conversation to history.")
 
-                st.markdown("### 🤖 Assistant's Response")
-                st.markdown(response)
-
-                # Generate TTS
+                # Collect audio clips as the background workers finish;
+                # most are already done by the time the stream ends
+                audio_paths = []
                 with st.spinner("Generating audio response..."):
-                    audio_path = tts.text_to_speech(response)
-
-                if audio_path:
-                    st.session_state.audio_path = audio_path
-
-                    # Play audio response (file path or bytes)
-                    # If audio_path is bytes-like, st.audio accepts it too. If it's a path, check existence.
-                    try:
-                        if isinstance(audio_path, (bytes, bytearray)):
-                            st.audio(audio_path)
-                        else:
-                            if os.path.exists(audio_path):
+                    for future in tts_futures:
+                        try:
+                            audio_path = future.result()
+                        except Exception:
+                            audio_path = None
+                        if audio_path:
+                            audio_paths.append(audio_path)
+
+                if audio_paths:
+                    st.session_state.audio_path = audio_paths
+
+                    # Play audio clips in sentence order (file path or bytes)
+                    for audio_path in audio_paths:
+                        try:
+                            if isinstance(audio_path, (bytes, bytearray)):
+                                st.audio(audio_path)
+                            elif os.path.exists(audio_path):
                                 st.audio(audio_path)
                             else:
                                 st.warning("Generated audio file not found.")
-                    except Exception:
-                        st.warning("Could not play generated audio.")
+                        except Exception:
+                            st.warning("Could not play generated audio.")
                 else:
                     st.error("Failed to generate audio response")
 
@@ -230,22 +316,27 @@ def main_app():
         st.markdown(st.session_state.last_response)
 
         if st.session_state.audio_path:
-            try:
-                if isinstance(st.session_state.audio_path, (bytes, bytearray)):
-                    st.audio(st.session_state.audio_path)
-                else:
-                    if os.path.exists(st.session_state.audio_path):
-                        st.audio(st.session_state.audio_path)
-            except Exception:
-                # don't crash if audio can't be played
-                pass
+            # audio_path may be a single path/bytes or a list of clip paths
+            audio_paths = st.session_state.audio_path
+            if not isinstance(audio_paths, list):
+                audio_paths = [audio_paths]
+
+            for audio_path in audio_paths:
+                try:
+                    if isinstance(audio_path, (bytes, bytearray)):
+                        st.audio(audio_path)
+                    elif os.path.exists(audio_path):
+                        st.audio(audio_path)
+                except Exception:
+                    # don't crash if audio can't be played
+                    pass
 
     # History section (user-specific)
     st.divider()
     st.subheader("📚 Conversation History")
 
     try:
-        history = db.get_user_history(st.session_state.user_id, limit=10)
+        history = _cached_user_history(st.session_state.user_id, limit=10)
     except Exception:
         history = []
 
@@ -1,13 +1,77 @@
 """Automatic Speech Recognition (ASR) module"""
 
+import io
 import os
-import tempfile
+import threading
 from typing import Optional
 
 
-def transcribe_audio_whisper(audio_bytes: bytes) -> Optional[str]:
+# Cached Whisper model, loaded once and reused across transcriptions.
+# Loading the model re-reads ~140MB of weights, so doing it per call
+# dominates the actual inference time.
+_WHISPER_MODEL = None
+_WHISPER_LOCK = threading.Lock()
+
+
+def _cuda_available() -> bool:
+    """
+    Check whether a CUDA device is available for CTranslate2.
+
+    Returns:
+        True if at least one CUDA device is usable, False otherwise
+    """
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+
+def get_whisper_model():
     """
-    Transcribe audio using OpenAI Whisper model.
+    Load the Whisper model once and cache it for reuse.
+
+    Uses faster-whisper (CTranslate2 backend). The model size comes from
+    the WHISPER_MODEL environment variable (default "base", e.g. "tiny"
+    for constrained CPUs). Runs float16 on GPU when CUDA is available,
+    int8 on CPU otherwise.
+
+    Returns:
+        The loaded WhisperModel instance
+    """
+    global _WHISPER_MODEL
+
+    if _WHISPER_MODEL is None:
+        with _WHISPER_LOCK:
+            # Re-check inside the lock in case another thread loaded it
+            if _WHISPER_MODEL is None:
+                from faster_whisper import WhisperModel
+
+                model_size = os.getenv("WHISPER_MODEL", "base")
+
+                if _cuda_available():
+                    _WHISPER_MODEL = WhisperModel(
+                        model_size,
+                        device="cuda",
+                        compute_type="float16",
+                    )
+                else:
+                    _WHISPER_MODEL = WhisperModel(
+                        model_size,
+                        device="cpu",
+                        compute_type="int8",
+                        cpu_threads=os.cpu_count() or 4,
+                    )
+
+    return _WHISPER_MODEL
+
+
+def transcribe_audio_groq(audio_bytes: bytes) -> Optional[str]:
+    """
+    Transcribe audio using Groq's hosted whisper-large-v3-turbo endpoint.
+
+    Offloads transcription to Groq's inference hardware, which returns a
+    larger model's result faster than running base Whisper locally.
 
     Args:
         audio_bytes: Raw audio data in bytes
@@ -16,27 +80,55 @@ def transcribe_audio_whisper(audio_bytes: bytes) -> Optional[str]:
         Transcribed text, or None if transcription fails
     """
     try:
-        import whisper
+        import groq_client
 
-        # Create a temporary file for the audio
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
+        client = groq_client.get_groq_client()
 
-        try:
-            # Load Whisper model (base model for balance of speed and accuracy)
-            model = whisper.load_model("base")
+        if not client:
+            return None
 
-            # Transcribe audio
-            result = model.transcribe(temp_audio_path)
-            transcript = result["text"].strip()
+        response = client.audio.transcriptions.create(
+            file=("audio.wav", audio_bytes),
+            model="whisper-large-v3-turbo",
+            response_format="text",
+        )
 
-            return transcript if transcript else None
+        transcript = response.strip() if isinstance(response, str) else response.text.strip()
+        return transcript if transcript else None
+
+    except ImportError:
+        print("Groq client not available, falling back to local transcription")
+        return None
+    except Exception as e:
+        print(f"Groq transcription error: {e}")
+        return None
 
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_audio_path):
-                os.remove(temp_audio_path)
+
+def transcribe_audio_whisper(audio_bytes: bytes, model=None) -> Optional[str]:
+    """
+    Transcribe audio using the Whisper model (faster-whisper backend).
+
+    Args:
+        audio_bytes: Raw audio data in bytes
+        model: Optional pre-loaded WhisperModel (e.g. one kept alive by
+            st.cache_resource); loads the module singleton if omitted
+
+    Returns:
+        Transcribed text, or None if transcription fails
+    """
+    try:
+        # Reuse an injected model, or the cached module singleton
+        if model is None:
+            model = get_whisper_model()
+
+        # Transcribe directly from memory; faster-whisper decodes
+        # file-like objects itself, so no temp file or ffmpeg fork needed
+        segments, _info = model.transcribe(
+            io.BytesIO(audio_bytes), beam_size=1, vad_filter=True
+        )
+        transcript = " ".join(segment.text.strip() for segment in segments).strip()
+
+        return transcript if transcript else None
 
     except ImportError:
         print("Whisper not available, falling back to speech_recognition")
@@ -60,28 +152,17 @@ def transcribe_audio_sr(audio_bytes: bytes) -> Optional[str]:
     try:
         import speech_recognition as sr
 
-        # Create a temporary file for the audio
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
-
-        try:
-            # Initialize recognizer
-            recognizer = sr.Recognizer()
+        # Initialize recognizer
+        recognizer = sr.Recognizer()
 
-            # Load audio file
-            with sr.AudioFile(temp_audio_path) as source:
-                audio_data = recognizer.record(source)
+        # Read audio directly from memory; AudioFile accepts file-like objects
+        with sr.AudioFile(io.BytesIO(audio_bytes)) as source:
+            audio_data = recognizer.record(source)
 
-            # Transcribe using Google Speech Recognition (free)
-            transcript = recognizer.recognize_google(audio_data)
+        # Transcribe using Google Speech Recognition (free)
+        transcript = recognizer.recognize_google(audio_data)
 
-            return transcript.strip() if transcript else None
-
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_audio_path):
-                os.remove(temp_audio_path)
+        return transcript.strip() if transcript else None
 
     except ImportError:
         print("speech_recognition library not available")
@@ -91,14 +172,16 @@ def transcribe_audio_sr(audio_bytes: bytes) -> Optional[str]:
         return None
 
 
-def transcribe_audio(audio_bytes: bytes, prefer_whisper: bool = True) -> Optional[str]:
+def transcribe_audio(audio_bytes: bytes, prefer_whisper: bool = True, model=None) -> Optional[str]:
     """
     Transcribe audio using available ASR methods.
-    Tries Whisper first (if preferred), then falls back to speech_recognition.
+    Tries the Groq hosted endpoint first, then local Whisper (if
+    preferred), then falls back to speech_recognition.
 
     Args:
         audio_bytes: Raw audio data in bytes
-        prefer_whisper: Whether to try Whisper first (default: True)
+        prefer_whisper: Whether to try local Whisper before speech_recognition
+        model: Optional pre-loaded WhisperModel to use for the local path
 
     Returns:
         Transcribed text, or None if all methods fail
@@ -106,9 +189,14 @@ def transcribe_audio(audio_bytes: bytes, prefer_whisper: bool = True) -> Optiona
     if not audio_bytes:
         return None
 
+    # Hosted transcription avoids all local model load/inference cost
+    transcript = transcribe_audio_groq(audio_bytes)
+    if transcript:
+        return transcript
+
     # Try Whisper first if preferred
     if prefer_whisper:
-        transcript = transcribe_audio_whisper(audio_bytes)
+        transcript = transcribe_audio_whisper(audio_bytes, model=model)
         if transcript:
             return transcript
 
@@ -124,7 +212,7 @@ def transcribe_audio(audio_bytes: bytes, prefer_whisper: bool = True) -> Optiona
             return transcript
 
         # Fallback to Whisper
-        transcript = transcribe_audio_whisper(audio_bytes)
+        transcript = transcribe_audio_whisper(audio_bytes, model=model)
         if transcript:
             return transcript
 
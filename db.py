@@ -3,21 +3,58 @@ Database module for voice learning assistant.
 Handles user authentication and conversation history using SQLite.
 """
 
+import os
 import sqlite3
+import threading
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 
 
 DB_PATH = "app.db"
 
+# bcrypt cost factor; 12 rounds is ~250ms of CPU per hash. Tunable via
+# environment for deployments that need a different latency/security
+# trade-off.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL while hashing, so running it on a worker
+# thread keeps the server responsive during login/registration
+_AUTH_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# One connection per thread, reused across calls. Opening a fresh
+# connection per query pays connection setup and a cold page cache
+# every time; WAL mode additionally lets readers proceed during writes.
+_local = threading.local()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """
+    Get (or lazily create) this thread's cached database connection.
+
+    Returns:
+        An open sqlite3.Connection in WAL mode with autocommit enabled
+    """
+    conn = getattr(_local, 'conn', None)
+
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        _local.conn = conn
+
+    return conn
+
 
 def init_db():
     """
     Initialize the database with required tables.
     Creates users and history tables if they don't exist.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = _get_conn()
     cursor = conn.cursor()
 
     # Users table
@@ -42,8 +79,12 @@ def init_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
+    # Composite index so per-user history retrieval walks the index in
+    # order instead of scanning and sorting the whole table
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_created
+        ON history(user_id, created_at DESC)
+    """)
 
 
 def hash_password(password: str) -> str:
@@ -56,8 +97,10 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password as string
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = _AUTH_EXECUTOR.submit(
+        bcrypt.hashpw, password.encode('utf-8'), salt
+    ).result()
     return hashed.decode('utf-8')
 
 
@@ -72,7 +115,9 @@ def verify_password(password: str, hashed: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return _AUTH_EXECUTOR.submit(
+        bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8')
+    ).result()
 
 
 def create_user(username: str, password: str) -> Optional[int]:
@@ -87,8 +132,7 @@ def create_user(username: str, password: str) -> Optional[int]:
         User ID if successful, None if username already exists
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        cursor = _get_conn().cursor()
 
         password_hash = hash_password(password)
         cursor.execute(
@@ -96,11 +140,7 @@ def create_user(username: str, password: str) -> Optional[int]:
             (username, password_hash)
         )
 
-        user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-
-        return user_id
+        return cursor.lastrowid
     except sqlite3.IntegrityError:
         # Username already exists
         return None
@@ -117,8 +157,7 @@ def authenticate_user(username: str, password: str) -> Optional[int]:
     Returns:
         User ID if authentication successful, None otherwise
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = _get_conn().cursor()
 
     cursor.execute(
         "SELECT id, password_hash FROM users WHERE username = ?",
@@ -126,7 +165,6 @@ def authenticate_user(username: str, password: str) -> Optional[int]:
     )
 
     result = cursor.fetchone()
-    conn.close()
 
     if result and verify_password(password, result[1]):
         return result[0]
@@ -143,8 +181,7 @@ def save_conversation(user_id: int, user_query: str, assistant_response: str):
         user_query: User's question/query
         assistant_response: Assistant's response
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = _get_conn().cursor()
 
     cursor.execute(
         """INSERT INTO history (user_id, user_query, assistant_response)
@@ -152,8 +189,33 @@ def save_conversation(user_id: int, user_query: str, assistant_response: str):
         (user_id, user_query, assistant_response)
     )
 
-    conn.commit()
-    conn.close()
+
+def save_conversations(conversations: List[Tuple[int, str, str]]):
+    """
+    Save multiple conversation exchanges to history in one transaction.
+
+    Batching the inserts pays the commit/fsync cost once instead of per
+    row, which matters for bulk imports or rapid multi-turn sessions.
+
+    Args:
+        conversations: List of (user_id, user_query, assistant_response) tuples
+    """
+    if not conversations:
+        return
+
+    conn = _get_conn()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            """INSERT INTO history (user_id, user_query, assistant_response)
+               VALUES (?, ?, ?)""",
+            conversations
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
 
 
 def get_user_history(user_id: int, limit: int = 50) -> List[Dict]:
@@ -167,8 +229,7 @@ def get_user_history(user_id: int, limit: int = 50) -> List[Dict]:
     Returns:
         List of conversation dictionaries with keys: id, query, response, timestamp
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = _get_conn().cursor()
 
     cursor.execute(
         """SELECT id, user_query, assistant_response, created_at
@@ -180,7 +241,6 @@ def get_user_history(user_id: int, limit: int = 50) -> List[Dict]:
     )
 
     results = cursor.fetchall()
-    conn.close()
 
     history = []
     for row in results:
@@ -204,11 +264,9 @@ def get_username(user_id: int) -> Optional[str]:
     Returns:
         Username if found, None otherwise
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = _get_conn().cursor()
 
     cursor.execute("SELECT username FROM users WHERE id = ?", (user_id,))
     result = cursor.fetchone()
-    conn.close()
 
     return result[0] if result else None
@@ -4,23 +4,45 @@ Handles chat completions using Groq's API with llama-3.1-8b-instant model.
 """
 
 import os
-from typing import Optional
+import re
+from typing import Iterator, Optional
 from groq import Groq
 
 
+LEARNING_ASSISTANT_SYSTEM_PROMPT = """You are a helpful voice-first learning assistant. Your role is to:
+- Provide clear, concise explanations suitable for voice interaction
+- Break down complex topics into simple, understandable parts
+- Use examples and analogies to aid understanding
+- Encourage curiosity and further learning
+- Keep responses conversational and engaging
+- Limit responses to 2-3 paragraphs for voice delivery
+
+Always be patient, supportive, and adapt your explanations to the learner's needs."""
+
+
+# Cached client; each Groq() instantiation builds a fresh httpx client,
+# so reusing one keeps TLS sessions and connection pools warm
+_CLIENT: Optional[Groq] = None
+
+
 def get_groq_client() -> Optional[Groq]:
     """
-    Initialize and return a Groq client instance.
+    Return the shared Groq client instance, creating it on first use.
 
     Returns:
         Groq client if API key is available, None otherwise
     """
-    api_key = os.getenv("GROQ_API_KEY")
+    global _CLIENT
 
-    if not api_key:
-        return None
+    if _CLIENT is None:
+        api_key = os.getenv("GROQ_API_KEY")
+
+        if not api_key:
+            return None
+
+        _CLIENT = Groq(api_key=api_key)
 
-    return Groq(api_key=api_key)
+    return _CLIENT
 
 
 def get_completion(
@@ -82,6 +104,102 @@ def get_completion(
         return None
 
 
+def get_completion_stream(
+    user_query: str,
+    system_prompt: Optional[str] = None,
+    model: str = "llama-3.1-8b-instant",
+    max_tokens: int = 1024,
+    temperature: float = 0.7
+) -> Optional[Iterator[str]]:
+    """
+    Get a streaming chat completion from Groq LLM.
+
+    Yields text deltas as they arrive, so callers can start downstream
+    work (display, TTS) before the full response is generated.
+
+    Args:
+        user_query: User's question or prompt
+        system_prompt: Optional system prompt to set context
+        model: Model to use (default: llama-3.1-8b-instant)
+        max_tokens: Maximum tokens in response
+        temperature: Sampling temperature (0.0 to 2.0)
+
+    Returns:
+        Iterator of response text chunks, or None if the client is unavailable
+    """
+    client = get_groq_client()
+
+    if not client:
+        return None
+
+    # Build messages array
+    messages = []
+
+    if system_prompt:
+        messages.append({
+            "role": "system",
+            "content": system_prompt
+        })
+
+    messages.append({
+        "role": "user",
+        "content": user_query
+    })
+
+    def _stream() -> Iterator[str]:
+        try:
+            chat_completion = client.chat.completions.create(
+                messages=messages,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+
+            for chunk in chat_completion:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        except Exception as e:
+            print(f"Error streaming from Groq API: {e}")
+
+    return _stream()
+
+
+def iter_sentences(deltas: Iterator[str]) -> Iterator[str]:
+    """
+    Group streamed text deltas into sentence-sized segments.
+
+    Lets callers hand each sentence to downstream work (TTS, display)
+    as soon as it is complete, while later tokens are still arriving.
+    Segments are yielded raw, with whitespace and newlines intact, so
+    concatenating them reproduces the original response exactly;
+    callers strip their own copies where needed.
+
+    Args:
+        deltas: Iterator of raw text chunks from a streaming completion
+
+    Returns:
+        Iterator of raw sentence segments, plus any trailing fragment
+    """
+    buffer = ""
+
+    for delta in deltas:
+        buffer += delta
+
+        while True:
+            match = re.search(r"[.!?]\s", buffer)
+            if not match:
+                break
+            segment = buffer[:match.end()]
+            buffer = buffer[match.end():]
+            yield segment
+
+    if buffer:
+        yield buffer
+
+
 def get_learning_assistant_response(user_query: str) -> Optional[str]:
     """
     Get a response from the learning assistant.
@@ -93,19 +211,27 @@ def get_learning_assistant_response(user_query: str) -> Optional[str]:
     Returns:
         Assistant's educational response, or None if request fails
     """
-    system_prompt = """You are a helpful voice-first learning assistant. Your role is to:
-- Provide clear, concise explanations suitable for voice interaction
-- Break down complex topics into simple, understandable parts
-- Use examples and analogies to aid understanding
-- Encourage curiosity and further learning
-- Keep responses conversational and engaging
-- Limit responses to 2-3 paragraphs for voice delivery
+    return get_completion(
+        user_query=user_query,
+        system_prompt=LEARNING_ASSISTANT_SYSTEM_PROMPT,
+        temperature=0.7,
+        max_tokens=512
+    )
 
-Always be patient, supportive, and adapt your explanations to the learner's needs."""
 
-    return get_completion(
+def get_learning_assistant_response_stream(user_query: str) -> Optional[Iterator[str]]:
+    """
+    Get a streaming response from the learning assistant.
+
+    Args:
+        user_query: User's learning question
+
+    Returns:
+        Iterator of response text chunks, or None if the client is unavailable
+    """
+    return get_completion_stream(
         user_query=user_query,
-        system_prompt=system_prompt,
+        system_prompt=LEARNING_ASSISTANT_SYSTEM_PROMPT,
         temperature=0.7,
         max_tokens=512
     )
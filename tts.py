@@ -1,17 +1,69 @@
 """
 Text-to-Speech (TTS) module for voice learning assistant.
-Uses gTTS with hash-based caching to avoid regenerating identical audio.
+Uses Piper for local synthesis when a voice model is configured (no
+network round-trip, works offline), falling back to gTTS. Hash-based
+caching avoids regenerating identical audio either way.
 """
 
+import io
 import os
 import hashlib
-from typing import Optional
+import re
+import threading
+import wave
+from typing import Dict, Optional, Tuple
 from gtts import gTTS
 
 
 # Cache directory for TTS audio files
 TTS_CACHE_DIR = "tts_cache"
 
+# Size cap for the cache; least-recently-used files are evicted first
+MAX_CACHE_MB = 100
+
+# In-flight synthesis tracking so concurrent requests for the same text
+# collapse into a single synthesis call instead of racing on the cache file
+_inflight: Dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+# Piper voice model (e.g. en_US-lessac-medium.onnx), loaded once when
+# piper-tts is installed and PIPER_VOICE points at a voice file
+_PIPER_VOICE = None
+_PIPER_TRIED = False
+_PIPER_LOCK = threading.Lock()
+
+# Cache file extensions for both synthesis backends
+CACHE_EXTENSIONS = ('.mp3', '.wav')
+
+
+def get_piper_voice():
+    """
+    Load the Piper voice once if available, caching the result.
+
+    Returns:
+        The loaded PiperVoice, or None if piper-tts is not installed or
+        no voice model is configured
+    """
+    global _PIPER_VOICE, _PIPER_TRIED
+
+    if not _PIPER_TRIED:
+        with _PIPER_LOCK:
+            if not _PIPER_TRIED:
+                voice_path = os.getenv("PIPER_VOICE")
+
+                if voice_path and os.path.exists(voice_path):
+                    try:
+                        from piper import PiperVoice
+                        _PIPER_VOICE = PiperVoice.load(voice_path)
+                    except ImportError:
+                        print("piper-tts not installed, using gTTS")
+                    except Exception as e:
+                        print(f"Could not load Piper voice: {e}")
+
+                _PIPER_TRIED = True
+
+    return _PIPER_VOICE
+
 
 def ensure_cache_dir():
     """
@@ -21,65 +73,169 @@ def ensure_cache_dir():
         os.makedirs(TTS_CACHE_DIR)
 
 
-def get_text_hash(text: str) -> str:
+def get_text_hash(text: str, language: str = 'en', slow: bool = False) -> str:
     """
-    Generate a hash for the given text.
+    Generate a cache key hash for the given text and synthesis options.
     Used for cache file naming.
 
+    The text is normalized (lowercased, whitespace collapsed) before
+    hashing so trivial variations of the same response still hit the
+    cache. Language and speech rate are part of the key since they
+    change the generated audio.
+
+    Prefers xxh3 (vectorized, ~10x faster than SHA-256) since cache
+    filenames don't need a cryptographic hash; 128 bits is plenty for
+    uniqueness. Falls back to truncated SHA-256 if xxhash is missing.
+
     Args:
         text: Text to hash
+        language: Language code used for synthesis
+        slow: Whether slow speech rate is used
 
     Returns:
-        SHA256 hash of the text
+        128-bit hex digest of the cache key
     """
-    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    normalized = re.sub(r'\s+', ' ', text.strip().lower())
+    key = f"{language}|{slow}|{normalized}"
 
+    try:
+        import xxhash
+        return xxhash.xxh3_128_hexdigest(key.encode('utf-8'))
+    except ImportError:
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
 
-def text_to_speech(text: str, language: str = 'en', slow: bool = False) -> Optional[str]:
+
+def _synthesize_to_buffer(text: str, language: str, slow: bool, voice) -> bytes:
+    """
+    Generate audio for the text entirely in memory.
+
+    Args:
+        text: Text to synthesize
+        language: Language code for gTTS
+        slow: Whether to use slower speech rate (gTTS only)
+        voice: Loaded PiperVoice, or None to use gTTS
+
+    Returns:
+        The synthesized audio bytes (WAV for Piper, MP3 for gTTS)
     """
-    Convert text to speech and save as MP3.
-    Uses hash-based caching to avoid regenerating identical audio.
+    buffer = io.BytesIO()
+
+    if voice is not None:
+        # Local Piper synthesis: ~100-300ms on CPU, no network.
+        # piper-tts >= 1.3 writes WAV via synthesize_wav; in 1.2
+        # synthesize itself took the wave file.
+        with wave.open(buffer, 'wb') as wav_file:
+            if hasattr(voice, 'synthesize_wav'):
+                voice.synthesize_wav(text, wav_file)
+            else:
+                voice.synthesize(text, wav_file)
+    else:
+        # Generate speech using gTTS (one HTTP round-trip)
+        gTTS(text=text, lang=language, slow=slow).write_to_fp(buffer)
+
+    return buffer.getvalue()
+
+
+def _get_or_synthesize(text: str, language: str, slow: bool) -> Tuple[Optional[str], Optional[bytes]]:
+    """
+    Return cached audio for the text, synthesizing it on a miss.
 
     Args:
         text: Text to convert to speech
         language: Language code (default: 'en')
-        slow: Whether to use slower speech rate (default: False)
+        slow: Whether to use slower speech rate (gTTS only)
 
     Returns:
-        Path to the generated/cached MP3 file, or None if generation fails
+        (cache_path, audio_bytes) tuple; audio_bytes is only set when
+        the audio was just synthesized (still in memory), and both are
+        None if generation fails
     """
     if not text or not text.strip():
-        return None
+        return None, None
 
     ensure_cache_dir()
 
-    # Generate cache filename based on text hash
-    text_hash = get_text_hash(text)
-    cache_filename = f"{text_hash}.mp3"
+    # Piper writes WAV, gTTS writes MP3; the extension keeps the two
+    # backends' cache entries distinct
+    voice = get_piper_voice()
+
+    # Generate cache filename based on normalized text + options hash
+    text_hash = get_text_hash(text, language, slow)
+    cache_filename = f"{text_hash}.wav" if voice else f"{text_hash}.mp3"
     cache_path = os.path.join(TTS_CACHE_DIR, cache_filename)
 
-    # Return cached file if it exists
+    # Return cached file if it exists, bumping its recency for LRU
     if os.path.exists(cache_path):
-        return cache_path
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return cache_path, None
+
+    # Single-flight: if another thread is already synthesizing this key,
+    # wait for it to finish instead of issuing a duplicate synthesis call
+    with _inflight_lock:
+        event = _inflight.get(text_hash)
+        is_owner = event is None
+        if is_owner:
+            event = threading.Event()
+            _inflight[text_hash] = event
+
+    if not is_owner:
+        event.wait()
+        return (cache_path, None) if os.path.exists(cache_path) else (None, None)
 
     try:
-        # Generate speech using gTTS
-        tts = gTTS(text=text, lang=language, slow=slow)
+        data = _synthesize_to_buffer(text, language, slow, voice)
 
-        # Save to cache
-        tts.save(cache_path)
+        # Write to a temp file and rename atomically so readers never
+        # see a partially written cache entry
+        temp_path = cache_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
 
-        return cache_path
+        # Keep the cache bounded, evicting least-recently-used entries
+        enforce_cache_limit()
+
+        return cache_path, data
 
     except Exception as e:
         print(f"TTS generation error: {e}")
-        return None
+        return None, None
+
+    finally:
+        with _inflight_lock:
+            _inflight.pop(text_hash, None)
+        event.set()
+
+
+def text_to_speech(text: str, language: str = 'en', slow: bool = False) -> Optional[str]:
+    """
+    Convert text to speech and save as an audio file.
+    Synthesizes locally with Piper when a voice model is configured,
+    otherwise uses gTTS. Hash-based caching avoids regenerating
+    identical audio.
+
+    Args:
+        text: Text to convert to speech
+        language: Language code (default: 'en')
+        slow: Whether to use slower speech rate (gTTS only)
+
+    Returns:
+        Path to the generated/cached audio file, or None if generation fails
+    """
+    cache_path, _data = _get_or_synthesize(text, language, slow)
+    return cache_path
 
 
 def text_to_speech_bytes(text: str, language: str = 'en', slow: bool = False) -> Optional[bytes]:
     """
     Convert text to speech and return as bytes.
 
+    On a cache miss the freshly synthesized bytes are returned straight
+    from memory, avoiding a re-read of the file just written.
+
     Args:
         text: Text to convert to speech
         language: Language code (default: 'en')
@@ -88,7 +244,10 @@ def text_to_speech_bytes(text: str, language: str = 'en', slow: bool = False) ->
     Returns:
         Audio data as bytes, or None if generation fails
     """
-    audio_path = text_to_speech(text, language, slow)
+    audio_path, data = _get_or_synthesize(text, language, slow)
+
+    if data is not None:
+        return data
 
     if not audio_path or not os.path.exists(audio_path):
         return None
@@ -101,6 +260,46 @@ def text_to_speech_bytes(text: str, language: str = 'en', slow: bool = False) ->
         return None
 
 
+def enforce_cache_limit(max_mb: float = MAX_CACHE_MB):
+    """
+    Evict least-recently-used cache files until the cache fits the cap.
+
+    Uses file modification time as the recency signal (hits bump it via
+    os.utime), so warm entries survive while stale ones are removed.
+
+    Args:
+        max_mb: Maximum total cache size in megabytes
+    """
+    if not os.path.exists(TTS_CACHE_DIR):
+        return
+
+    try:
+        entries = []
+        total_size = 0
+        with os.scandir(TTS_CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(CACHE_EXTENSIONS):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+
+        max_bytes = max_mb * 1024 * 1024
+        if total_size <= max_bytes:
+            return
+
+        # Oldest (least recently used) first
+        entries.sort()
+
+        for _mtime, size, path in entries:
+            if total_size <= max_bytes:
+                break
+            os.remove(path)
+            total_size -= size
+
+    except Exception as e:
+        print(f"Error enforcing cache limit: {e}")
+
+
 def clear_cache(max_files: Optional[int] = None):
     """
     Clear the TTS cache directory.
@@ -112,7 +311,7 @@ def clear_cache(max_files: Optional[int] = None):
         return
 
     try:
-        files = [f for f in os.listdir(TTS_CACHE_DIR) if f.endswith('.mp3')]
+        files = [f for f in os.listdir(TTS_CACHE_DIR) if f.endswith(CACHE_EXTENSIONS)]
 
         # Check if we should clear based on max_files
         if max_files is not None and len(files) <= max_files:
@@ -140,14 +339,18 @@ def get_cache_stats() -> dict:
         return {'file_count': 0, 'total_size_mb': 0.0}
 
     try:
-        files = [f for f in os.listdir(TTS_CACHE_DIR) if f.endswith('.mp3')]
-        total_size = sum(
-            os.path.getsize(os.path.join(TTS_CACHE_DIR, f))
-            for f in files
-        )
+        # scandir carries stat info with each entry, avoiding a separate
+        # stat() syscall per file
+        file_count = 0
+        total_size = 0
+        with os.scandir(TTS_CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(CACHE_EXTENSIONS):
+                    file_count += 1
+                    total_size += entry.stat().st_size
 
         return {
-            'file_count': len(files),
+            'file_count': file_count,
             'total_size_mb': round(total_size / (1024 * 1024), 2)
         }
 